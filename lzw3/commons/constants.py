@@ -11,6 +11,9 @@ class LZWConstants:
     COMPRESSED_FILE_EXTENSION = ".Z"
     """ Extension that will be appended or checked for LZW compressed files. """
 
+    IO_BUFFER_SIZE = 1024 * 1024
+    """ Size of the buffer of the files opened by the compressor and the decompressor. """
+
 
 class Resources:
     COMPRESS_HELP = "compress_help.txt"
@@ -1,5 +1,5 @@
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime
 
 
 class Logger:
@@ -11,6 +11,12 @@ class Logger:
     _enabled = True
     """ Whether the logger is enabled. """
 
+    _last_second = None
+    """ Second (since the epoch) of the last time string that has been formatted. """
+
+    _last_time_string = None
+    """ Last formatted time string, which is reused for the logs within the same second. """
+
     @staticmethod
     def log(tag: str, *args):
         """ Prints to argument list to standard output using the given tag.
@@ -20,7 +26,12 @@ class Logger:
             *args: args to yield to the print statement
         """
         if Logger._enabled:
-            print("[" + datetime.now().strftime("%H:%M:%S") + "] {" + tag + "} ", *args, sep='')
+            # Format the time only if the second is changed since the last log
+            second = int(time.time())
+            if second != Logger._last_second:
+                Logger._last_second = second
+                Logger._last_time_string = time.strftime("%H:%M:%S", time.localtime(second))
+            print("[", Logger._last_time_string, "] {", tag, "} ", *args, sep='')
 
     @staticmethod
     def enable_logger(enable: bool):
@@ -48,6 +59,9 @@ class Loggable(ABC):
         """ Prints to argument list to standard output.
         The tag provided by get_logger_name() is prepended
         to the print statement.
+        The arguments are converted to string only if the entity is
+        enabled to log, thus should be passed as separate arguments
+        instead of being concatenated by the caller.
 
         Args:
             *args: args to yield to the print statement
@@ -1,8 +1,7 @@
 import math
 import os
 import time
-from collections import Callable
-from typing import Union
+from typing import Callable, Union
 
 from lzw3.commons.constants import SizeUnits, TimeUnits
 
@@ -55,11 +54,13 @@ def timed(fun: Callable, *args, **kwargs) -> int:
     Returns:
         int: the amount of milliseconds for execute the function
     """
-    t_start = time.time()
+    # perf_counter() is monotonic and has the highest available resolution,
+    # whereas time() might be adjusted while the function is executing
+    t_start = time.perf_counter()
     fun(*args, **kwargs)
-    t_end = time.time()
+    t_end = time.perf_counter()
 
-    return round((t_end - t_start) * 1000)
+    return round((t_end - t_start) * TimeUnits.MS_IN_SEC)
 
 
 def file_permission_mask(file: str) -> int:
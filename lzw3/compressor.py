@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import Union
+from typing import Iterable
 
 from lzw3.helpers import LZWHelper, LZWHelperStarter
 from lzw3.io.bit import BitWriter
@@ -10,10 +10,20 @@ from lzw3.commons.log import Loggable, Logger
 from lzw3.commons.constants import LZWConstants, Resources
 from lzw3.commons.utils import timed, permission_mask, humanify_bytesize, humanify_ms
 
+EDGE_BITS = LZWConstants.STREAM_END.bit_length()
+""" Amount of bits reserved to the edge within a key of the sequence table. """
+
+CODE_BUFFER_SIZE = 1 << 16
+""" Amount of sequences buffered before actually write those to the output file. """
+
 
 class LZWCompressor(Loggable):
     """ Compressor of regular files that use LZW algorithm. """
-    
+
+    _initial_sequence_table = None
+    """ Sequence table that contains only the alphabet and the STREAM_END;
+    is created once and then copied for each compression. """
+
     def _get_logger_tag(self) -> str:
         return "COMPRESSOR"
 
@@ -36,27 +46,68 @@ class LZWCompressor(Loggable):
         Returns:
             bool: whether the file (exists and) has been compressed successfully
         """
-        if not os.path.exists(in_file_path):
-            self._log("Compression failed! File '" + in_file_path + "' doesn't exists")
+        # The input file is memory mapped so that the encoding loop
+        # iterates directly over the mapped bytes (see read_all()) instead
+        # of reading byte per byte, without load the whole file in memory.
+        # (The existence of the file is not checked before, since it would
+        # cost another stat() while the open() fails anyway)
+        try:
+            self._in_file = ByteReader(in_file_path)
+        except FileNotFoundError:
+            self._log("Compression failed! File '", in_file_path, "' doesn't exists")
             return False
 
-        self._init()
+        # The files are closed even if the compression fails, so that
+        # neither the mapping of the input file is left behind
+        try:
+            self._init()
+
+            self._log("Compressing file '", in_file_path, "' to '", out_file_path, "'")
+
+            self._out_file = BitWriter(out_file_path)
 
-        self._log("Compressing file '", in_file_path, "' to '", out_file_path, "'")
+            try:
+                self._encode(self._in_file.read_all())
+            finally:
+                self._out_file.close()
+        finally:
+            self._in_file.close()
 
-        self._in_file = ByteReader(in_file_path)
-        self._out_file = BitWriter(out_file_path)
+        return True
+
+    def _encode(self, content: Iterable[int]):
+        """ Encodes the given content and writes the sequences to the output file.
+        This is the per-byte hot loop of the compressor, thus the sequence table
+        and the counters are bound to locals for the whole loop (and written back
+        to the compressor at the end).
+
+        The sequences to write are buffered and are written in batches of
+        (at most) CODE_BUFFER_SIZE sequences; since all the sequences of
+        a batch are represented with the same amount of bits, the batch is
+        written also each time that amount changes.
+
+        Args:
+            content (:obj:`iterable` of :obj:`int`): the bytes of the file to compress
+        """
+        sequence_table = self._sequence_table
+        get_sequence = sequence_table.get
+        next_sequence_number = self._next_sequence_number
+        current_sequence_bit_count = self._current_sequence_bit_count
+
+        # The sequence number for which one more bit will be required
+        next_bit_count_sequence_number = 1 << current_sequence_bit_count
+
+        write_codes = self._out_file.write_many
+        codes = []
+        emit_code = codes.append
 
         # Start from the ROOT (empty sequence)
         seq_parent = LZWConstants.ROOT
 
-        for c in self._in_file:
-            # self._log("<< {", c, "} (", chr(c), ")")
-
+        for c in content:
             # Retrieve the sequence associated with the character just read
             # appended to the sequence read so far
-            seq = self._get_sequence(seq_parent, c)
-            # self._log("| ", seq_parent, " --{", c, "}-->  ", seq)
+            seq = get_sequence((seq_parent << EDGE_BITS) | c)
 
             if seq is not None:
                 # We have read a character for a known sequence.
@@ -67,18 +118,32 @@ class LZWCompressor(Loggable):
             else:
                 # We have read a character that makes the sequence unknown.
 
-                # Write to file the sequence read so far (without this character)
-                # self._log(">> ", seq_parent)
-                self._write_sequence(seq_parent)
+                # Write the sequence read so far (without this character)
+                emit_code(seq_parent)
 
-                # Add the new sequence using the next sequence number
-                # self._log("+= ", seq_parent, " --{", c, "}--> ", self._next_sequence_number)
-                self._insert_next_sequence(seq_parent, c)
-
-                # Restart from the sequence of this character
-                seq_parent = self._get_sequence(LZWConstants.ROOT, c)
+                if len(codes) == CODE_BUFFER_SIZE:
+                    write_codes(codes, current_sequence_bit_count)
+                    codes.clear()
 
-            # self._log("---")
+                # Add the new sequence using the next sequence number
+                sequence_table[(seq_parent << EDGE_BITS) | c] = next_sequence_number
+
+                # Increment the number of bits required for represent the sequence
+                # if this sequence number has a new bit set to 1.
+                # (This is a reasonable way to avoid to call log2 each time, and works
+                # because the sequence number are progressive)
+                # (The sequences buffered so far are written before, since
+                # those have to be represented with the previous amount of bits)
+                if next_sequence_number == next_bit_count_sequence_number:
+                    write_codes(codes, current_sequence_bit_count)
+                    codes.clear()
+                    current_sequence_bit_count += 1
+                    next_bit_count_sequence_number <<= 1
+                next_sequence_number += 1
+
+                # Restart from the sequence of this character, which is
+                # the character itself (see the initial sequence table)
+                seq_parent = c
 
         # Write the last character; this is necessary in both case
         # 1) If the read sequence was recognized with the last char
@@ -87,89 +152,55 @@ class LZWCompressor(Loggable):
         # 2) If the read sequence was not recognized due the last char
         #    then the sequence minus the last char has been written,
         #    so there is still need to write the last char
-        # self._log(">> ", seq_parent)
-        self._write_sequence(seq_parent)
+        # (There is nothing to write only if the input file is empty)
+        if seq_parent != LZWConstants.ROOT:
+            emit_code(seq_parent)
 
-        # self._log("Input file stream's ended")
+        write_codes(codes, current_sequence_bit_count)
 
         # Write the STREAM_END character so that the decompressor can detect it.
-        # self._log(">> ", LZWConstants.STREAM_END)
-        self._write_sequence(LZWConstants.STREAM_END)
+        # The decompressor has already inserted the sequence for the last
+        # written one (the compressor doesn't, since no character follows it),
+        # thus the STREAM_END is read with the bits of next_sequence_number;
+        # this matters only if next_sequence_number is a power of 2.
+        self._out_file.write(LZWConstants.STREAM_END, next_sequence_number.bit_length())
 
-        self._in_file.close()
-        self._out_file.close()
-
-        return True
+        self._next_sequence_number = next_sequence_number
+        self._current_sequence_bit_count = current_sequence_bit_count
 
     def _init(self):
-        """ Initializes the compressor with the initial setup. """
-
-        # Dictionary for keep the sequences; the structure is the following
-        # ( K, V ) = ( (ParentSeqNum: int, EdgeToChild: int(0:255), ChildSeqNum: int )
-        self._sequence_table = dict()
-
-        # Number that will be associated to the next sequence
-        self._next_sequence_number = 0
-
-        # Number of bits necessary for represents the current sequence number
-        self._current_sequence_bit_count = 0
-
-        self._log("Initializing sequence table; alphabet size = ",
-                  LZWConstants.ALPHABET_SIZE)
-
-        # Alphabet characters initialization
-        for i in range(LZWConstants.ALPHABET_SIZE):
-            self._insert_next_sequence(LZWConstants.ROOT, i)
-
-        # Special character for STREAM_END
-        self._insert_next_sequence(LZWConstants.ROOT, LZWConstants.STREAM_END)
-
-    def _insert_next_sequence(self, parent_seq: int, edge: int):
-        """ Inserts the next sequence number for the given parent and edge.
-
-        Args:
-            parent_seq (int): the sequence value of the leaf of the parent
-                of the sequence that will be inserted
-            edge (int): the label of the edge that links the given parent to
-                the sequence that will be inserted; should be < ALPHABET_SIZE
+        """ Initializes the compressor with the initial setup.
+        Can be called before each compression, so that the same compressor
+        can be used for more files.
         """
-        self._sequence_table[(parent_seq, edge)] = self._next_sequence_number
-
-        # Increment the number of bits required for represent the sequence
-        # if this sequence number has a new bit set to 1.
-        # (This is a reasonable way to avoid to call log2 each time, and works
-        # because the sequence number are progressive)
-        self._current_sequence_bit_count += \
-            (self._next_sequence_number >> self._current_sequence_bit_count)
-
-        self._next_sequence_number += 1
 
-    def _get_sequence(self, parent_seq: int, edge: int) -> Union[int, None]:
-        """
-        Returns the sequence associated with the leaf found starting from
-        the given parent and descending using the given edge.
+        if LZWCompressor._initial_sequence_table is None:
+            self._log("Initializing sequence table; alphabet size = ",
+                      LZWConstants.ALPHABET_SIZE)
 
-        Args:
-            parent_seq (int): the sequence value of the leaf of the parent
-                of the sequence to find
-            edge (int): the label of the edge that links the given parent to
-                the sequence to find; should be < ALPHABET_SIZE
+            # Alphabet characters and special character for STREAM_END;
+            # the sequence number of each of them is the character itself
+            # (the encoding relies on this for restart from a character)
+            LZWCompressor._initial_sequence_table = {
+                (LZWConstants.ROOT << EDGE_BITS) | c: c
+                for c in range(LZWConstants.STREAM_END + 1)
+            }
 
-        Returns:
-            int: the sequence found descending from parent_seq using edge or
-                None if it doesn't exist
-        """
-        return self._sequence_table.get((parent_seq, edge), None)
+        # Dictionary for keep the sequences; the structure is the following
+        # ( K, V ) = ( (ParentSeqNum << EDGE_BITS) | EdgeToChild, ChildSeqNum )
+        # The parent and the edge are packed into a single int so that
+        # a lookup neither allocates nor hashes a tuple.
+        # (The ROOT is negative, but the packed key is still unique).
+        # The table can't be presized since the dict doesn't provide a way
+        # to reserve its capacity and the amount of sequences is unbounded;
+        # anyway the resizes are geometric, thus their cost is amortized.
+        self._sequence_table = LZWCompressor._initial_sequence_table.copy()
 
-    def _write_sequence(self, seq: int):
-        """ Writes the given sequence to the output file.
+        # Number that will be associated to the next sequence
+        self._next_sequence_number = len(self._sequence_table)
 
-        Args:
-            seq (int): the sequence number to write to the output file.
-                This will automatically be written with the right amount
-                of bits to represents it.
-        """
-        self._out_file.write(seq, self._current_sequence_bit_count)
+        # Number of bits necessary for represents the current sequence number
+        self._current_sequence_bit_count = (self._next_sequence_number - 1).bit_length()
 
 
 class LZWCompressorHelper(LZWHelper):
@@ -183,7 +214,13 @@ class LZWCompressorHelper(LZWHelper):
     def _can_log(self) -> bool:
         return False
 
-    def _handle_file(self, file: str):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The same compressor is used for all the files
+        self._compressor = LZWCompressor()
+
+    def _handle_file(self, file: str, file_stat: os.stat_result = None):
         """ Handles the (regular) file by compressing it.
         Some more logic is handled:
         <ul>
@@ -196,9 +233,12 @@ class LZWCompressorHelper(LZWHelper):
 
         Args:
             file (str): the path of the file to handle
+            file_stat (os.stat_result): the result of os.stat(file), if
+                already retrieved
         """
         # Retrieve size and perm mask of the file
-        file_stat = os.stat(file)
+        if file_stat is None:
+            file_stat = os.stat(file)
         uncompressed_size = file_stat.st_size
         perm_mask = permission_mask(file_stat)
 
@@ -211,19 +251,20 @@ class LZWCompressorHelper(LZWHelper):
 
         in_compression_file_string = "'" + file + "'"
 
-        if not Logger.is_logger_enabled():
+        if not Logger.is_logger_enabled() and self._jobs == 1:
             # Print the name of the file now so that the user may now what's
             # going on for slow compressions, if logger is enabled this can't
             # be done since the further debug messages will break the prints
+            # (neither if files are handled in parallel, for the same reason)
             self._print("'", file, "'", end="", flush=True)
             in_compression_file_string = ""
 
         # Measure the decompression time if required
         if self._time:
-            ms = timed(LZWCompressor.compress, LZWCompressor(), file, file_out)
+            ms = timed(self._compressor.compress, file, file_out)
             time_string = " (" + humanify_ms(ms) + ")"
         else:
-            LZWCompressor().compress(file, file_out)
+            self._compressor.compress(file, file_out)
 
         compressed_size = os.path.getsize(file_out)
         self._log("Compression finished", time_string,
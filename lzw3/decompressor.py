@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import List
+from array import array
 
 from lzw3.helpers import LZWHelper, LZWHelperStarter
 from lzw3.io.byte import ByteWriter
@@ -8,12 +8,21 @@ from lzw3.io.bit import BitReader
 
 from lzw3.commons.log import Loggable, Logger
 from lzw3.commons.constants import LZWConstants, Resources
-from lzw3.commons.utils import timed, file_permission_mask, humanify_ms
+from lzw3.commons.utils import timed, permission_mask, humanify_ms
+
+CODE_BUFFER_SIZE = 1 << 16
+""" Maximum amount of sequences read at once from the input file. """
 
 
 class LZWDecompressor(Loggable):
     """ Decompressor of regular files that use LZW algorithm. """
 
+    _initial_sequence_table = None
+    _initial_sequence_starts = None
+    _initial_sequence_lengths = None
+    """ Sequence table that contains only the alphabet and the STREAM_END;
+    is created once and then copied for each decompression. """
+
     def _get_logger_tag(self) -> str:
         return "DECOMPRESSOR"
 
@@ -36,73 +45,137 @@ class LZWDecompressor(Loggable):
         Returns:
             bool: whether the file (exists and) has been decompressed successfully
         """
-        if not os.path.exists(in_file_path):
-            self._log("Decompression failed! File '" + in_file_path + "' doesn't exists")
+        # (The existence of the file is not checked before, since it would
+        # cost another stat() while the open() fails anyway)
+        try:
+            self._in_file = BitReader(in_file_path)
+        except FileNotFoundError:
+            self._log("Decompression failed! File '", in_file_path, "' doesn't exists")
             return False
 
         self._init()
 
         self._log("Decompressing file '", in_file_path, "' to '", out_file_path, "'")
 
-        self._in_file = BitReader(in_file_path)
         self._out_file = ByteWriter(out_file_path)
 
         # Before start the main loop we have to read the first sequence
         # (which must be an alphabet sequence) and place it to output
         seq_parent = self._in_file.read(self._current_sequence_bit_count)
-        seq_parent_path = self._get_sequence_path(seq_parent)
 
-        # self._log(">> ", seq_parent_path)
-        self._out_file.write(seq_parent_path)
+        # The STREAM_END comes first only if the original file was empty
+        if seq_parent == LZWConstants.STREAM_END:
+            self._in_file.close()
+            self._out_file.close()
+            return True
 
-        seq_path = seq_parent_path
-        seq_path_first = seq_parent_path[0]
-
-        for seq in self._in_file:
-            # self._log("<< {", seq, "}")
+        seq_parent_path = self._get_sequence_path(seq_parent)
 
-            # STREAM_END reached (EOF)
-            if seq == LZWConstants.STREAM_END:
+        # The paths are not written to the output file one by one, but are
+        # accumulated to an output buffer that is written once it's big enough
+        output = bytearray(seq_parent_path)
+        output_size = LZWConstants.IO_BUFFER_SIZE
+
+        # This is the per-sequence hot loop of the decompressor, thus the
+        # sequence table, the counters and the methods of the files are bound
+        # to locals for the whole loop (and written back at the end) and
+        # the lookup of sequence paths is inlined.
+        sequence_table = self._sequence_table
+        sequence_starts = self._sequence_starts
+        sequence_lengths = self._sequence_lengths
+        insert_sequence_start = sequence_starts.append
+        insert_sequence_length = sequence_lengths.append
+        next_sequence_number = self._next_sequence_number
+        current_sequence_bit_count = self._current_sequence_bit_count
+
+        # The sequence number for which one more bit will be required
+        next_bit_count_sequence_number = 1 << current_sequence_bit_count
+        write = self._out_file.write
+        read_sequences = self._in_file.read_many
+
+        while True:
+            # The sequences are read in batches of sequences that require
+            # the same amount of bits, that is all the sequences until the
+            # next sequence number that requires one more bit (since a
+            # sequence is inserted for each sequence read)
+            seqs = read_sequences(
+                min(next_bit_count_sequence_number - next_sequence_number,
+                    CODE_BUFFER_SIZE),
+                current_sequence_bit_count
+            )
+
+            # EOF reached without STREAM_END (should not happen)
+            if not seqs:
                 break
 
-            is_normal_case = seq < self._next_sequence_number
-
-            # "Normal" case, the read sequence number is well known so
-            # the seq_path is assigned to the path to reach the sequence number
-            if is_normal_case:
-                seq_path = self._get_sequence_path(seq)
-                seq_path_first = seq_path[0]
-
-            # For both the "normal" and the "special" case the sequence path to
-            # insert is the previous sequence path plus the first component
-            # of the current sequence path (which is the same path for the
-            # "special" case)
-            new_seq_path = seq_parent_path + [seq_path_first]
-
-            # Add the new sequence path using the next sequence number
-            # self._log("+= ", new_seq_path, " = ", self._next_sequence_number)
-            self._insert_next_sequence_path(new_seq_path)
-
-            if is_normal_case:
-                # For the "normal" case the path to write is the one
-                # associated with the read sequence number
-                seq_out_path = seq_path
+            for seq in seqs:
+                # STREAM_END reached (EOF)
+                if seq == LZWConstants.STREAM_END:
+                    break
+
+                # For both the "normal" and the "special" case the sequence path to
+                # insert is the previous sequence path plus the first component
+                # of the current sequence path (which is the same path for the
+                # "special" case); the path is appended directly to the table
+                # without build it apart.
+                # Add the new sequence path using the next sequence number;
+                # there is not need to keep the sequence number since the
+                # sequence numbers begin from 0 and so the position of the start
+                # and of the length of the path is the sequence number.
+                new_seq_start = len(sequence_table)
+
+                if seq < next_sequence_number:
+                    # "Normal" case, the read sequence number is well known so
+                    # the path to write is the one associated with the read
+                    # sequence number (same as _get_sequence_path())
+                    seq_start = sequence_starts[seq]
+                    seq_out_path = sequence_table[seq_start:seq_start + sequence_lengths[seq]]
+                    seq_path_first = sequence_table[seq_start]
+
+                    sequence_table += seq_parent_path
+                    sequence_table.append(seq_path_first)
+                else:
+                    # "Special" case, the path to write is the one we are going
+                    # to create since we do not have that path in our table yet
+                    # (the first component of the current sequence path is the
+                    # first component of the previous one)
+                    seq_path_first = seq_parent_path[0]
+
+                    sequence_table += seq_parent_path
+                    sequence_table.append(seq_path_first)
+                    seq_out_path = sequence_table[new_seq_start:]
+
+                insert_sequence_start(new_seq_start)
+                insert_sequence_length(len(seq_parent_path) + 1)
+                next_sequence_number += 1
+
+                # Write the path to the output file (buffer)
+                output += seq_out_path
+                if len(output) >= output_size:
+                    write(output)
+                    output.clear()
+
+                # Continue from the path we've just wrote to file
+                seq_parent_path = seq_out_path
             else:
-                # For the "special" case the path to write is the just created
-                # one since we do not have that path in our table yet
-                seq_out_path = new_seq_path
+                # Increment the number of bits required for represent the sequence
+                # if the next sequence number has a new bit set to 1, so that the
+                # next batch is read with the new amount of bits.
+                # (This happens only when the sequence number reaches a power of 2,
+                # that is at the end of a complete batch).
+                # The decompressor switches to the new bit size one step before the compressor
+                if next_sequence_number == next_bit_count_sequence_number:
+                    current_sequence_bit_count += 1
+                    next_bit_count_sequence_number <<= 1
+                continue
 
-            # Write the path to the output file
-            # self._log(">> ", seq_out_path)
-            self._out_file.write(seq_out_path)
+            # STREAM_END reached, leave the outer loop too
+            break
 
-            # Continue from the path we've just wrote to file
-            seq_parent_path = seq_out_path
+        write(output)
 
-            # Set the amount of bits to read for the next read
-            self._in_file.set_bits_per_read(self._current_sequence_bit_count)
-
-            # self._log("---")
+        self._next_sequence_number = next_sequence_number
+        self._current_sequence_bit_count = current_sequence_bit_count
 
         self._in_file.close()
         self._out_file.close()
@@ -110,67 +183,58 @@ class LZWDecompressor(Loggable):
         return True
 
     def _init(self):
-        """ Initializes the decompressor with the initial setup. """
+        """ Initializes the decompressor with the initial setup.
+        Can be called before each decompression, so that the same decompressor
+        can be used for more files.
+        """
 
-        # List for keep the sequences;
-        # Each element is a list of integers € [0, 255] that represents the path
-        # from the ROOT node (excluded) to the sequence number associated with the
-        # position of the element in the list.
+        if LZWDecompressor._initial_sequence_table is None:
+            self._log("Initializing sequence table; alphabet size = ",
+                      LZWConstants.ALPHABET_SIZE)
+
+            # Alphabet characters, whose path is the character itself, and
+            # special character for STREAM_END, whose path is empty since it
+            # doesn't fit a byte (and is never written anyway)
+            LZWDecompressor._initial_sequence_table = \
+                bytearray(range(LZWConstants.ALPHABET_SIZE))
+            LZWDecompressor._initial_sequence_starts = \
+                array("q", range(LZWConstants.ALPHABET_SIZE + 1))
+            LZWDecompressor._initial_sequence_lengths = \
+                array("q", [1] * LZWConstants.ALPHABET_SIZE + [0])
+
+        # Flat buffer for keep the sequences;
+        # The buffer contains the paths of all the sequences one after the other,
+        # where a path is the list of bytes € [0, 255] from the ROOT node (excluded)
+        # to the sequence number.
+        # The path of a sequence number starts at _sequence_starts[seq] and is
+        # _sequence_lengths[seq] bytes long.
         # e.g. A sequence 'ABC' with sequence number 275 will be placed in
-        # _sequence_table[275] = [65 (A), 66 (B), 67 (C)]
-        self._sequence_table = []
+        # _sequence_table[_sequence_starts[275]:] = [65 (A), 66 (B), 67 (C)]
+        # and _sequence_lengths[275] = 3
+        # Keeping the paths in a single buffer (instead of a list per sequence)
+        # avoids the allocation of a list (and its integers) for each sequence.
+        self._sequence_table = LZWDecompressor._initial_sequence_table[:]
+        self._sequence_starts = LZWDecompressor._initial_sequence_starts[:]
+        self._sequence_lengths = LZWDecompressor._initial_sequence_lengths[:]
 
         # Number that will be associated to the next sequence
-        self._next_sequence_number = 0
+        self._next_sequence_number = len(self._sequence_starts)
 
         # Number of bits necessary for represents the current sequence number
-        self._current_sequence_bit_count = 0
+        self._current_sequence_bit_count = self._next_sequence_number.bit_length()
 
-        self._log("Initializing sequence table; alphabet size = ",
-                  LZWConstants.ALPHABET_SIZE)
-
-        # Alphabet characters initialization
-        for i in range(LZWConstants.ALPHABET_SIZE):
-            self._insert_next_sequence_path([i])
-
-        # Special character for STREAM_END
-        self._insert_next_sequence_path([LZWConstants.STREAM_END])
-
-    def _insert_next_sequence_path(self, seq_path: List[int]):
-        """ Inserts the given path to the table using the next sequence number.
-
-        Args:
-            seq_path (:obj:`list` of :obj:`int`): the path as list of integer,
-                where each element represent the ASCII code of a character
-                that composes the sequence.
-        """
-        # Actually there is not need to call .insert(self._next_sequence_number, seq_path)
-        # since the sequence numbers begin from 0 and so the append() and the
-        # insert() would do the same thing.
-        self._sequence_table.append(seq_path)
-
-        self._next_sequence_number += 1
-
-        # Increment the number of bits required for represent the sequence
-        # if the next sequence number has a new bit set to 1.
-        # (This is a reasonable way to avoid to call log2 each time, and works
-        # because the sequence number are progressive).
-        # The decompressor switches to the new bit size one step before the compressor
-        self._current_sequence_bit_count += \
-            (self._next_sequence_number >> self._current_sequence_bit_count)
-
-    def _get_sequence_path(self, seq: int) -> List[int]:
+    def _get_sequence_path(self, seq: int) -> bytearray:
         """ Returns the path associated with the given sequence number.
 
         Args:
             seq (int): the sequence number of the path to retrieve
 
         Returns:
-            (:obj:`list` of :obj:`int`): the path as list of integer,
-                where each element represent the ASCII code of a character
-                that composes the sequence.
+            bytearray: the path as bytes, where each element represent
+                the ASCII code of a character that composes the sequence.
         """
-        return self._sequence_table[seq]
+        start = self._sequence_starts[seq]
+        return self._sequence_table[start:start + self._sequence_lengths[seq]]
 
 
 class LZWDecompressorHelper(LZWHelper):
@@ -184,7 +248,13 @@ class LZWDecompressorHelper(LZWHelper):
     def _can_log(self) -> bool:
         return True
 
-    def _handle_file(self, file: str):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The same decompressor is used for all the files
+        self._decompressor = LZWDecompressor()
+
+    def _handle_file(self, file: str, file_stat: os.stat_result = None):
         """ Handles the (regular) file by decompressing it.
         Some more logic is handled:
         <ul>
@@ -197,6 +267,8 @@ class LZWDecompressorHelper(LZWHelper):
 
         Args:
             file (str): the path of the file to handle
+            file_stat (os.stat_result): the result of os.stat(file), if
+                already retrieved
         """
 
         # Skips decompression for non .Z files; this is convenient in order
@@ -222,31 +294,34 @@ class LZWDecompressorHelper(LZWHelper):
             self._print("'", file, "' skipped")
             return
 
+        # Retrieve perm mask of the file, before it is eventually replaced
+        if file_stat is None:
+            file_stat = os.stat(file)
+        perm_mask = permission_mask(file_stat)
+
         time_string = " "
 
         in_decompression_file_string = "'" + file + "'"
 
-        if not Logger.is_logger_enabled():
+        if not Logger.is_logger_enabled() and self._jobs == 1:
             # Print the name of the file now so that the user may now what's
             # going on for slow decompressions, if logger is enabled this can't
             # be done since the further debug messages will break the prints
+            # (neither if files are handled in parallel, for the same reason)
             self._print("'", file, "'", end="", flush=True)
             in_decompression_file_string = ""
 
         # Measure the compression time if required
         if self._time:
-            ms = timed(LZWDecompressor.decompress, LZWDecompressor(), file, file_out)
+            ms = timed(self._decompressor.decompress, file, file_out)
             time_string = " (" + humanify_ms(ms) + ")"
         else:
-            LZWDecompressor().decompress(file, file_out)
+            self._decompressor.decompress(file, file_out)
 
         self._log("Decompression finished", time_string)
         self._print(in_decompression_file_string, " decompressed", time_string)
 
         if not in_place:
-            # Retrieve perm mask of the file
-            perm_mask = file_permission_mask(file)
-
             if not self._keep:
                 self._log("--> (Deleting compressed file)")
                 os.remove(file)
@@ -254,7 +329,7 @@ class LZWDecompressorHelper(LZWHelper):
                 self._log("--> (Keeping compressed file)")
 
             # Write permissions on the new file copying to the old ones
-            self._log("Writing previous permissions to new file = ", file_permission_mask)
+            self._log("Writing previous permissions to new file = ", perm_mask)
             os.chmod(file_out, perm_mask)
 
 
@@ -1,5 +1,7 @@
 import os
+import stat
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 
 from lzw3.commons.log import Loggable, Logger
@@ -13,7 +15,7 @@ class LZWHelper(Loggable, ABC):
     """
 
     def __init__(self, recursive: bool, verbose: bool,
-                 time: bool, keep: bool, force: bool):
+                 time: bool, keep: bool, force: bool, jobs: int = 1):
         """ Initializes this helper.
 
         Args:
@@ -24,6 +26,8 @@ class LZWHelper(Loggable, ABC):
             keep (bool): whether keep original files after the task
             force (bool): whether force the action (for compression means to
                             always keep the output file)
+            jobs (int): amount of files to handle in parallel, each one
+                        in a different process
         """
         super().__init__()
         self._recursive = recursive
@@ -31,23 +35,87 @@ class LZWHelper(Loggable, ABC):
         self._time = time
         self._keep = keep
         self._force = force
+        self._jobs = jobs
+
+        # Executor of the files to handle, used only if jobs > 1
+        self._executor = None
+        self._pending_files = []
+
+    def __getstate__(self):
+        """ Returns the state of this helper without the executor, which
+        can't be pickled; this is needed since the helper is sent to the
+        processes that handle the files in parallel.
+        The state of the logger is included too, since the processes
+        might not inherit it (e.g. if these are spawned instead of forked).
+
+        Returns:
+            dict: the state of this helper
+        """
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_pending_files"] = []
+        state["_logger_enabled"] = Logger.is_logger_enabled()
+        return state
+
+    def __setstate__(self, state: dict):
+        """ Restores the state of this helper, and the state of the logger,
+        within the process that will handle the files.
+
+        Args:
+            state (dict): the state returned by __getstate__()
+        """
+        Logger.enable_logger(state.pop("_logger_enabled"))
+        self.__dict__.update(state)
 
     def handle(self, files: List[str]):
         """ Handles the file list using the settings provided to this helper.
 
+        Args:
+            files (:obj:`list` of :obj:`str`): list of files (or directories)
+                to handle
+        """
+        if self._jobs > 1:
+            # The files are independent from each other, thus these are
+            # handled in parallel by a pool of processes (and not threads,
+            # since the compression is CPU bound); the directories are still
+            # visited by this process while the files are handled.
+            with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+                self._executor = executor
+                self._handle(files)
+
+                # Wait for the files and raise their exception, if any
+                for pending_file in self._pending_files:
+                    pending_file.result()
+
+            self._executor = None
+            self._pending_files = []
+        else:
+            self._handle(files)
+
+    def _handle(self, files: List[str]):
+        """ Handles the file list, dispatching each file to _dispatch_file().
+
         Args:
             files (:obj:`list` of :obj:`str`): list of files (or directories)
                 to handle
         """
         for f in files:
-            if os.path.isfile(f):
-                self._handle_file(f)
-            elif os.path.isdir(f):
+            # A single stat() is done for both the checks, instead of one
+            # for os.path.isfile() and another for os.path.isdir()
+            try:
+                f_stat = os.stat(f)
+            except OSError:
+                # (As os.path.isX(f), consider f not existing for any error)
+                f_stat = None
+
+            if f_stat is not None and stat.S_ISREG(f_stat.st_mode):
+                # The stat result is passed along so that it's not retrieved again
+                self._dispatch_file(f, f_stat)
+            elif f_stat is not None and stat.S_ISDIR(f_stat.st_mode):
                 if self._recursive:
                     self._handle_directory(f)
                 else:
                     self._log("Found a directory while mode is non-recursive; skipping it")
-            # os.path.isX(f) return False if the f doesn't exist
             else:
                 self._log("File '", f, "' doesn't exist; skipping it")
                 self._print("'", f, "' not found!")
@@ -58,21 +126,83 @@ class LZWHelper(Loggable, ABC):
         Args:
             directory (str): the path of the directory to handle
         """
-        for root, d_names, f_names in os.walk(directory):
-            self._log("Visiting ", directory, "\n"
-                      "\troot:  ", root, "\n"
-                      "\tdirs:  ", d_names, "\n"
-                      "\tfiles:  ", f_names)
+        # The directories are visited top-down as os.walk() would do, but
+        # os.scandir() is used directly, so that the type of each entry is
+        # taken from the directory listing itself (without a stat() per entry)
+        # and the path of each entry is already provided.
+        directories = [directory]
+
+        while directories:
+            root = directories.pop()
+            d_names = []
+            f_names = []
+
+            # (The iterator is not used as a context manager for python3.5
+            # compatibility; it is closed anyway once exhausted)
+            try:
+                for entry in os.scandir(root):
+                    # As os.walk(), symbolic links to directories are
+                    # not entered, while anything else is treated as a file
+                    # (even if its type can't be retrieved)
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        try:
+                            is_symlink = entry.is_symlink()
+                        except OSError:
+                            is_symlink = True
+
+                        if not is_symlink:
+                            d_names.append(entry.path)
+                    else:
+                        f_names.append(entry.path)
+            except OSError as e:
+                # As os.walk(), a directory that can't be listed is skipped
+                self._log("Can't list directory '", root, "' (", e, "); skipping it")
+                continue
+
+            # (The lists of the directory are not even passed to the logger
+            # if this helper can't log or the logger is disabled)
+            if self.enabled and Logger.is_logger_enabled():
+                self._log("Visiting ", directory, "\n"
+                          "\troot:  ", root, "\n"
+                          "\tdirs:  ", d_names, "\n"
+                          "\tfiles:  ", f_names)
+
             for f in f_names:
-                self._handle_file(os.path.join(root, f))
+                self._dispatch_file(f)
+
+            # Reversed so that the directories are popped in listing order
+            directories.extend(reversed(d_names))
+
+    def _dispatch_file(self, file: str, file_stat: os.stat_result = None):
+        """ Handles the file immediately, or submits it to the executor
+        if the files have to be handled in parallel.
+
+        Args:
+            file (str): the path of the file to handle
+            file_stat (os.stat_result): the result of os.stat(file), if
+                already retrieved
+        """
+        if self._executor is not None:
+            self._pending_files.append(
+                self._executor.submit(self._handle_file, file, file_stat))
+        else:
+            self._handle_file(file, file_stat)
 
     @abstractmethod
-    def _handle_file(self, file: str):
+    def _handle_file(self, file: str, file_stat: os.stat_result = None):
         """ Handles the (regular) file by executing the appropriate task.
         Actually it should be implemented compressing xor decompressing the file.
 
         Args:
             file (str): the path of the file to handle
+            file_stat (os.stat_result): the result of os.stat(file), if
+                already retrieved; otherwise should be retrieved by the
+                implementation, if needed
         """
         pass
 
@@ -98,6 +228,17 @@ class LZWHelperStarter:
     ARG_KEEP = "-k"
     ARG_FORCE = "-f"
     ARG_DEBUG = "-d"
+    ARG_JOBS = "-j"
+
+    FLAGS = {
+        ARG_RECURSIVE: "recursive",
+        ARG_VERBOSE: "verbose",
+        ARG_TIME: "time",
+        ARG_KEEP: "keep",
+        ARG_FORCE: "force",
+        ARG_DEBUG: "debug"
+    }
+    """ Name of the option enabled by each flag argument. """
 
     def __init__(self, helper_class: type(LZWHelper), help_res: str):
         """
@@ -113,23 +254,17 @@ class LZWHelperStarter:
 
     def start(self, args: List[str]):
         """ Parses the given argument list and actually start the bound LZWHelper.
-        Accepted arguments are "-r", "-v", "-t", "-k", "-f", "-d".
+        Accepted arguments are "-r", "-v", "-t", "-k", "-f", "-d", "-j[N]".
 
         Args:
             args (:obj:`list` of :obj:`str`): the argument list (sys.argv)
         """
-        arg_count = len(args)
-
         # Quit showing help if the user doesn't provide arguments
-        if arg_count == 0:
+        if not args:
             self._abort(-1, True)
 
-        recursive = False
-        verbose = False
-        time = False
-        keep = False
-        force = False
-        debug = False
+        options = dict.fromkeys(LZWHelperStarter.FLAGS.values(), False)
+        jobs = 1
         files = []
 
         # Whether the next arguments will be treated as file names
@@ -146,26 +281,42 @@ class LZWHelperStarter:
 
             if reading_files_args:
                 files.append(arg)
+            elif arg in LZWHelperStarter.FLAGS:
+                options[LZWHelperStarter.FLAGS[arg]] = True
+
+            # The amount of jobs is attached to the argument (e.g. -j4);
+            # if not specified a job for each CPU is used
+            elif arg.startswith(LZWHelperStarter.ARG_JOBS):
+                jobs_arg = arg[len(LZWHelperStarter.ARG_JOBS):]
+                if not jobs_arg:
+                    jobs = os.cpu_count() or 1
+                elif jobs_arg.isdigit() and int(jobs_arg) > 0:
+                    jobs = int(jobs_arg)
+                else:
+                    self._abort(-2, True)
+
+            # Quit showing help for unknown arguments
             else:
-                recursive |= (arg == LZWHelperStarter.ARG_RECURSIVE)
-                verbose |= (arg == LZWHelperStarter.ARG_VERBOSE)
-                time |= (arg == LZWHelperStarter.ARG_TIME)
-                keep |= (arg == LZWHelperStarter.ARG_KEEP)
-                force |= (arg == LZWHelperStarter.ARG_FORCE)
-                debug |= (arg == LZWHelperStarter.ARG_DEBUG)
+                self._abort(-2, True)
+
+        # The debug option is handled here, the others by the helper
+        debug = options.pop("debug")
 
         Logger.enable_logger(debug)
-        Logger.log("MAIN", "Executing LZW task with following options:\n",
-                   "\trecursive:  ", recursive, "\n",
-                   "\tverbose:    ", verbose, "\n",
-                   "\ttime:       ", time, "\n",
-                   "\tkeep:       ", keep, "\n",
-                   "\tforce:      ", force, "\n",
-                   "\tdebug:      ", debug, "\n",
-                   "\tfiles:      ", files)
-
-        self._helper_class(recursive=recursive, verbose=verbose,
-                           time=time, keep=keep, force=force).handle(files)
+
+        # (The options are not even passed to the logger if it is disabled)
+        if Logger.is_logger_enabled():
+            Logger.log("MAIN", "Executing LZW task with following options:\n",
+                       "\trecursive:  ", options["recursive"], "\n",
+                       "\tverbose:    ", options["verbose"], "\n",
+                       "\ttime:       ", options["time"], "\n",
+                       "\tkeep:       ", options["keep"], "\n",
+                       "\tforce:      ", options["force"], "\n",
+                       "\tdebug:      ", debug, "\n",
+                       "\tjobs:       ", jobs, "\n",
+                       "\tfiles:      ", files)
+
+        self._helper_class(jobs=jobs, **options).handle(files)
 
     def _abort(self, exit_code: int, show_help: bool):
         """ Quits with the given exit code, eventually showing an help page.
@@ -1,7 +1,21 @@
+from typing import List
+
+from lzw3.commons.constants import LZWConstants
 from lzw3.commons.log import Loggable
 
 BYTE_SIZE = 8
-BYTE_MASK = 0xFF  # 1111 1111
+
+ACCUMULATOR_SIZE = 64
+""" Amount of bits that are read from (or packed before written to) the file at once. """
+
+ACCUMULATOR_BYTES = ACCUMULATOR_SIZE // BYTE_SIZE
+""" Amount of bytes that are read from the file at once by BitReader.__next__(). """
+
+OUTPUT_BUFFER_SIZE = 1 << 16
+""" Amount of packed bytes after which the BitWriter actually writes to the file. """
+
+READ_MANY_CHUNK_SIZE = 64
+""" Amount of bytes that are read from the file at once by BitReader.read_many(). """
 
 
 class BitReader(Loggable):
@@ -21,7 +35,7 @@ class BitReader(Loggable):
     def __init__(self,
                  in_file_path: str,
                  bits_per_read: int = BYTE_SIZE,
-                 buffer_size: int = None):
+                 buffer_size: int = LZWConstants.IO_BUFFER_SIZE):
         """ Initializes a new BitReader for the given file, actually opening it.
 
         Args:
@@ -30,27 +44,25 @@ class BitReader(Loggable):
                 can be eventually changed after, even during the iteration
                 over this entity
             buffer_size (int): the size of the buffer to use for reads,
-                if not provided the default size will be used.
+                if not provided LZWConstants.IO_BUFFER_SIZE will be used.
         """
         super().__init__()
 
-        if buffer_size is not None:
-            self._file = open(in_file_path, "rb", buffering=buffer_size)
-        else:
-            self._file = open(in_file_path, "rb")
+        self._file = open(in_file_path, "rb", buffering=buffer_size)
+
+        # The read method of the file is bound once instead of for each refill
+        self._read_file = self._file.read
 
         # Amount of bit the consumer expects we read from the file
         self._bits_per_read = bits_per_read
 
-        # Amount of unaligned bits we have read from the file so far
-        # Is always < 8 since we never reads more byte then the minimum amount
-        # we need to create the value
-        self._read_bit_count = 0
+        # Bits we have read from the file but not yet provided to the consumer.
+        # The file is read ACCUMULATOR_SIZE bits at once; the bits that are read
+        # first are the most significant bits of the accumulator.
+        self._acc = 0
 
-        # Value of the unaligned amount of bits (read_bit_count) we have read
-        # so far.
-        # Since read_bit_count is always < 8, this is always <= 128
-        self._unaligned_rest = 0
+        # Amount of bits in the accumulator
+        self._acc_bits = 0
 
         # Whether we have reached EOF and so we have to raise StopIteration
         # for the next call
@@ -76,56 +88,40 @@ class BitReader(Loggable):
         if self._eof:
             raise StopIteration
 
-        # Sum the value remained from the unaligned bits of the last read
-        v = self._unaligned_rest
-
-        # Read bytes until we reached a count of read bytes greater
-        # than the number of bits (* 8) we have to read
-        while self._read_bit_count < self._bits_per_read:
-            B = self._file.read(1)
-            if B:
-                # Sum the value of the just read byte with the previous
-                # value, shifted by 8 so that the result is just a concatenation
-                # of the previous bits and this byte
-                v = B[0] | (v << BYTE_SIZE)
+        bits_per_read = self._bits_per_read
+        acc = self._acc
+        acc_bits = self._acc_bits
 
-                # We have read 8 more bit, advance the count
-                self._read_bit_count += BYTE_SIZE
-
-                # self.log("Read byte {", c[0], "}, v = ", v)
-            else:
+        # Refill the accumulator until it contains at least the amount of
+        # bits we have to read (typically a single refill is needed, since
+        # the values are usually shorter than ACCUMULATOR_SIZE).
+        while acc_bits < bits_per_read:
+            chunk = self._read_file(ACCUMULATOR_BYTES)
+            if not chunk:
                 # When EOF is reached we should not raise StopIteration
-                # since we might still have a certain unaligned amount
-                # of bits to yield; instead return the unaligned_rest
+                # since we might still have a certain amount of bits to yield;
+                # instead return the bits remained in the accumulator
                 # and raise StopIteration with the next iteration
-
-                # self.log("EOF reached, returning remaining value")
                 self._eof = True
-                return self._unaligned_rest
-
-        # Set the amount of bits read equals to the unaligned amount of bits
-        # remained out from the creation of this value.
-        # e.g. If we have read 2 byte (16 bits) but we have been request to
-        # provide a value for a length of 14 bits, then we have read 2 bit more
-        # that we have to keep into consideration for the next read, so
-        # read_bit_count will be = 2
-        self._read_bit_count -= self._bits_per_read
-
-        # The rest is calculated by considering only the bits taken out from
-        # this value, which actually is done by consider only the first
-        # (8 - read_bit_count) bits of the value
-        # e.g. If we have read 16 bits we provided a value for 14, then
-        # the unaligned_rest is the first 2 least significant bits of the value
-        self._unaligned_rest = v & (BYTE_MASK >> (BYTE_SIZE - self._read_bit_count))
-
-        # And finally the value is calculated as the value shifted by the
-        # amount of bits that we have read in excess
-        v = v >> self._read_bit_count
-
-        # self.log("read_bit_count: ", self._read_bit_count)
-        # self.log("unaligned_rest: ", self._unaligned_rest)
-
-        return v
+                self._acc = 0
+                self._acc_bits = 0
+                return acc
+
+            # Concatenate the bits just read to the accumulator
+            chunk_bits = len(chunk) * BYTE_SIZE
+            acc = (acc << chunk_bits) | int.from_bytes(chunk, "big")
+            acc_bits += chunk_bits
+
+        # The value is made by the 'bits_per_read' most significant bits of
+        # the accumulator; the remaining bits are kept for the next reads
+        # e.g. acc = 0101 0001 0001 1100 (16 bits) | read_per_bits = 10
+        #      v = 01 0001 0001 => 273
+        #      acc = 01 1100 (6 bits)
+        acc_bits -= bits_per_read
+        self._acc = acc & ((1 << acc_bits) - 1)
+        self._acc_bits = acc_bits
+
+        return acc >> acc_bits
 
     def read(self, bits_per_read: int = None) -> int:
         """ Reads the next chunk of bits from the file.
@@ -147,12 +143,69 @@ class BitReader(Loggable):
             self._bits_per_read = bits_per_read
         return self.__next__()
 
+    def read_many(self, count: int, bits_per_read: int) -> List[int]:
+        """ Reads the next 'count' chunks of bits from the file, each of
+        the specified amount of bits.
+        Is equivalent to call read() 'count' times, but, since all the chunks
+        have the same size, the values are extracted from the accumulator
+        many at once, for each READ_MANY_CHUNK_SIZE bytes read from the file.
+
+        Args:
+            count (int): the amount of chunks to read
+            bits_per_read (int): the amount of bits of each chunk
+
+        Returns:
+            (:obj:`list` of :obj:`int`): the integer values of the chunks of bits
+                read from the file; might be less than 'count' if the end of
+                the file has been reached.
+        """
+        values = []
+        extend_values = values.extend
+        read_file = self._read_file
+        acc = self._acc
+        acc_bits = self._acc_bits
+        mask = (1 << bits_per_read) - 1
+
+        while count > 0:
+            # Refill the accumulator, if it doesn't contain at least a chunk
+            # of the file (in order to extract many values at once)
+            chunk = None
+            if acc_bits < READ_MANY_CHUNK_SIZE * BYTE_SIZE:
+                chunk = read_file(READ_MANY_CHUNK_SIZE)
+                acc = (acc << (len(chunk) * BYTE_SIZE)) | int.from_bytes(chunk, "big")
+                acc_bits += len(chunk) * BYTE_SIZE
+
+            available = min(acc_bits // bits_per_read, count)
+
+            # EOF reached and no more values available
+            if available == 0 and not chunk:
+                break
+
+            # Take the 'available' values from the most significant bits
+            # of the accumulator (the first read is the most significant one)
+            # e.g. acc = 0101 0001 0001 1100 (16 bits) | read_per_bits = 5
+            #      values = [01010 (10), 00100 (4), 01110 (14)]
+            #      acc = 0 (1 bit)
+            acc_bits -= available * bits_per_read
+            extend_values([
+                (acc >> shift) & mask
+                for shift in range(acc_bits + (available - 1) * bits_per_read,
+                                   acc_bits - 1, -bits_per_read)
+            ])
+            acc &= (1 << acc_bits) - 1
+            count -= available
+
+        self._acc = acc
+        self._acc_bits = acc_bits
+
+        return values
+
     def set_bits_per_read(self, bits_per_read: int):
         """ Sets the amount of bits to read from the file.
         Actually it should be more appropriate to say: sets the amount of bits
         to take into consideration for make the next integer that will be
-        given by read() or __next__(), since the file is actually read byte
-        per byte anyway.
+        given by read() or __next__(), since the file is actually read
+        ACCUMULATOR_SIZE bits at once anyway.
 
         Args:
             bits_per_read (int): amount of bits to read for each read
@@ -174,39 +227,27 @@ class BitWriter(Loggable):
     def _can_log(self) -> bool:
         return True
 
-    def __init__(self, out_file_path: str, buffer_size : int = None):
+    def __init__(self, out_file_path: str, buffer_size: int = LZWConstants.IO_BUFFER_SIZE):
         """ Initializes a new BitWriter for the given file, actually opening it.
 
         Args:
             out_file_path (str): the path of the file that will be written
             buffer_size (int): the size of the buffer to use for writes,
-                if not provided the default size will be used.
+                if not provided LZWConstants.IO_BUFFER_SIZE will be used.
         """
         super().__init__()
 
-        if buffer_size is not None:
-            self._file = open(out_file_path, "wb", buffering=buffer_size)
-        else:
-            self._file = open(out_file_path, "wb")
+        self._file = open(out_file_path, "wb", buffering=buffer_size)
 
-            # Amount of unaligned bits we have read from the file so far
-            # Is always < 8 since we never reads more byte then the minimum amount
-            # we need to create the value
+        # Bits we still have to write to the file; the bits of the most recent
+        # value are the least significant bits of the accumulator.
+        self._acc = 0
 
-        # Amount of unaligned bits we still have to write to the file, but we
-        # can do since we still don't have a full byte to write.
-        # Is always < 8 (since if it reaches 8 the byte is actually written)
-        self._unalignment = 0
+        # Amount of bits in the accumulator
+        self._acc_bits = 0
 
-        # Value of the unaligned amount of bits (read_bit_count)
-        # we still have to write to the file.
-        # Since read_bit_count is always < 8, this is always < 128
-        self._unaligned_rest = 0
-
-        # This is kept as class variable in order to avoid to reallocate
-        # a bytes() each time. (Whereas bytearray is mutable).
-        # Only _B[0] will be used, as a single byte.
-        self._B = bytearray(1)
+        # Bytes already packed but still not written to the file
+        self._out = bytearray()
 
     def write(self, value: int, bits_per_write: int):
         """
@@ -214,7 +255,8 @@ class BitWriter(Loggable):
         amount of bits.
 
         Args:
-            value (int): the integer value to write to the file
+            value (int): the (non negative) integer value to write to the file,
+                must be representable with bits_per_write bits
             bits_per_write (int): the amount of bits used for represent the value
 
         """
@@ -222,132 +264,92 @@ class BitWriter(Loggable):
         """
         The writing is done using the following logic:
 
-        The given value is byte-shifted starting from the shift
-        that makes the value be represented with only one byte.
-        e.g. value = 3155 (1100 0101 0011) | bits_per_write = 18
-             #1 shift = 18 - 8 = 10
-             b = 3155 >> 10 = {0000 0011}
-
-        The successive shifts are 1 byte less then the previous shift
-        (until the shift is positive).
-        e.g. value = 3155 (1100 0101 0011) | bits_per_write = 18
-            #2 shift = 18 - 8 - 8 = 2
-            b = 3155 >> 2 = [0011] {0001 0100}
-
-        Notes that only the least significant bits should be taken
-        into consideration (for the first shift it is not needed, but
-        for successive shifts it is needed in order not to take bits
-        outside the byte taken into consideration).
-
-        The first writes just write the obtained number (value >> shift)
-        to the file using binary representation.
-
-        After each value write, a certain amount of bits are excluded
-        from being written to the file (= unalignment); those will be
-        considered for the next write.
-
-        e.g. value = 3155 (1100 0101 0011) | bits_per_write = 18
-            ... after 2 shifts ...
-            unalignment = 2 (excluded bits)
-            unaligned_rest = last_<unalignment>_bits = 11 => 1100 0000
-
-        Next writes will take into account the fact that there might be
-        misaligned bits from the previous value and so will adjust the
-        shift accordingly.
-        Furthermore we have to sum the unaligned_rest from the previous
-        value with the first byte obtained from the current value.
+        The value is concatenated to the bits still to write (the accumulator)
+        as its least significant bits.
+        e.g. acc = 101 | value = 3155 (1100 0101 0011) | bits_per_write = 18
+             acc = 101 00 0000 1100 0101 0011 (21 bits)
+
+        Once the accumulator contains at least ACCUMULATOR_SIZE bits, the
+        full bytes are taken from its most significant bits and moved to the
+        output buffer, while the bits that do not fulfill a byte (< 8) are
+        kept in the accumulator for the next writes.
+        e.g. (with ACCUMULATOR_SIZE = 16)
+             acc = 1010 0000 0110 0010 1001 1 (21 bits)
+             out += A 0 6 2
+             acc = 1001 1 (5 bits)
+
+        The output buffer is written to the file once it contains at least
+        OUTPUT_BUFFER_SIZE bytes.
+        """
 
-        Complete example:
-            1) write value 3155 (1100 0101 0011) | bits_per_write = 18
+        acc = (self._acc << bits_per_write) | value
+        acc_bits = self._acc_bits + bits_per_write
 
-            #1 shift = 18 - 8 = 10
-            b = 3155 >> 10 = {0000 0011} => 0 3
+        if acc_bits >= ACCUMULATOR_SIZE:
+            out = self._out
+            unalignment = acc_bits & 0x7
+            out += (acc >> unalignment).to_bytes(acc_bits >> 3, "big")
+            acc &= (1 << unalignment) - 1
+            acc_bits = unalignment
 
-            #2 shift = 18 - 8 - 8 = 2
-            b = 3155 >> 2 = [0011] {0001 0100} => 1 4
+            if len(out) >= OUTPUT_BUFFER_SIZE:
+                self._flush()
 
-            unalignment = 2
-            unaligned_rest = last_<unalignment>_bits = 11 => 1100 0000 => C 0
+        self._acc = acc
+        self._acc_bits = acc_bits
 
-            2) write value 13 (1101) | bits_per_write = 5
+    def write_many(self, values: List[int], bits_per_write: int):
+        """
+        Writes the given values to the file representing each one with the
+        specified amount of bits.
+        Is equivalent to call write() for each value, but the accumulator
+        is kept local for the whole batch.
 
-            No shift
+        Args:
+            values (:obj:`list` of :obj:`int`): the (non negative) integer
+                values to write to the file, each must be representable
+                with bits_per_write bits
+            bits_per_write (int): the amount of bits used for represent each value
+        """
+        out = self._out
+        acc = self._acc
+        acc_bits = self._acc_bits
 
-            unalignment = 7 (8 - number of left shift in order to let
-                            the bits 'touch' the last misaligned bits)
-            unaligned_rest  = last_<unalignment>_bits
-                            = 1100 0000 |
-                              __01 101_
-                            = 1101 101_
+        for value in values:
+            acc = (acc << bits_per_write) | value
+            acc_bits += bits_per_write
 
-            3) Close file => write unaligned_rest zero end padded
-                1101 101_ => D A
+            if acc_bits >= ACCUMULATOR_SIZE:
+                unalignment = acc_bits & 0x7
+                out += (acc >> unalignment).to_bytes(acc_bits >> 3, "big")
+                acc &= (1 << unalignment) - 1
+                acc_bits = unalignment
 
-            So => 0 3 1 4 D A
-        """
+        self._acc = acc
+        self._acc_bits = acc_bits
 
-        # self.log("Writing, ", value, " with ", wlength, " bits")
-
-        # The initial shift is the amount of shift needed for make the
-        # value exactly of 8 significant bits.
-        # The unalignment from the previous write is also taken into consideration.
-        shift = bits_per_write - (BYTE_SIZE - self._unalignment)
-
-        # Shifts the value until we have completely considered (and thus shifted) it
-        while shift >= 0:
-
-            # Extracts the next 8 bits from the value to write, eventually
-            # prepending the unaligned_rest from the previous write
-            # The value is put in & with (BYTE_MASK >> unalignment) in order
-            # to not consider bits already considered from previous shifts.
-            self._B[0] = (value >> shift) \
-                         & (BYTE_MASK >> self._unalignment) \
-                         | self._unaligned_rest
-
-            # self._log("-> [", "{:x}".format(self._B[0] >> 4), " ", "{:x}".format(self._B[0] & 0xF), "]"
-            #           "\t(", value, " >> ", shift, " & ", (BYTE_MASK >> self._unalignment), ")")
-            self._file.write(self._B)
-
-            # The next shift will consider the next 8 bits
-            shift -= BYTE_SIZE
-
-            # Reset the unalignment, actually needed just for the first shift
-            self._unalignment = 0
-            self._unaligned_rest = 0
-
-        # We have a certain amount of bits that cannot be written since
-        # do not fulfill s full byte
-        self._unalignment = shift + BYTE_SIZE
-
-        # Calculated the value of the <unalignment> number of bits we
-        # still have not written.
-        # The idea is to shift the value so that the least significant bit
-        # of the value is a position 'i' so that 'i' + unalignment fulfills a byte.
-        # The last | self._unaligned_rest is needed for tolerate cases
-        # in which the value to write is not enough to complete a byte
-        # (so the value is not written to the file, but instead the unaligned_rest
-        # is just increased until we have a full byte to write)
-        self._unaligned_rest = (value << (BYTE_SIZE - self._unalignment)) \
-            & BYTE_MASK | self._unaligned_rest
-
-        # self._log("unalignment:    ", self._unalignment)
-        # self._log("unaligned_rest: ", self._unaligned_rest)
+        if len(out) >= OUTPUT_BUFFER_SIZE:
+            self._flush()
 
     def close(self):
         """ Closes the file.
-        This also writes the last unaligned_rest bits still to write,
-        eventually end padded with zeros.
+        This also writes the last bits still to write, end padded with zeros.
         """
 
-        # self.log("Writing unaligned rest as byte (end padded with zeros)...")
-        self._unalignment = 0
-
-        # Note that we can't call __write_byte since it will start pad the byte
-        # but we want to end pad it (since this is a bit writing).
-        self.write(self._unaligned_rest, BYTE_SIZE)
+        # The bits are end padded up to a full byte; if those are already
+        # aligned to a byte a zero byte is padded anyway
+        padding = BYTE_SIZE - (self._acc_bits & 0x7)
+        acc_bits = self._acc_bits + padding
+        self._out += (self._acc << padding).to_bytes(acc_bits >> 3, "big")
 
+        self._flush()
         self._file.close()
 
+    def _flush(self):
+        """ Writes the bytes packed so far to the file. """
+        self._file.write(self._out)
+        self._out.clear()
+
 
 if __name__ == "__main__":
     bw = BitWriter("bit.bin")
@@ -1,29 +1,59 @@
-from typing import List
+import mmap
+import os
+from typing import List, Union
+
+from lzw3.commons.constants import LZWConstants
 
 
 class ByteReader:
     """ Entity that provides a way to read a file byte per byte.
-    The reading can easily be done by iterate over this entity.
+    The reading can easily be done by iterate over this entity,
+    or all at once with read_all().
+
+    The file is memory mapped (if possible), so that the bytes are taken directly from
+    the mapped memory instead of calling read() for each of them.
     """
 
-    def __init__(self, in_file_path: str, buffer_size: int = None):
+    def __init__(self, in_file_path: str, buffer_size: int = LZWConstants.IO_BUFFER_SIZE):
         """ Initializes a new ByteReader for the given file, actually opening it.
         The file will be opened in binary mode, without any encoding assumption.
 
         Args:
             in_file_path (str): the path of the file that will be read
             buffer_size (int): the size of the buffer to use for reads,
-                if not provided the default size will be used.
+                if not provided LZWConstants.IO_BUFFER_SIZE will be used.
+                (Used only if the file can't be memory mapped)
         """
-        if buffer_size is not None:
-            self._file = open(in_file_path, "rb", buffering=buffer_size)
-        else:
-            self._file = open(in_file_path, "rb")
+        self._file = open(in_file_path, "rb", buffering=buffer_size)
+
+        self._mmap = None
+        self._bytes = None
+
+        # View of the mapped memory returned by read_all(), if any
+        self._remaining = None
+
+        # Index of the next byte to read, for __next__()
+        self._position = 0
+
+        try:
+            # An empty file can't be mapped; it is read through the file anyway
+            if os.fstat(self._file.fileno()).st_size > 0:
+                try:
+                    self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    # Neither some files that report a size can be mapped
+                    # (e.g. the ones of /sys); read those through the file too
+                    self._mmap = None
+                else:
+                    self._bytes = memoryview(self._mmap)
+        except BaseException:
+            self._file.close()
+            raise
 
     def __iter__(self):
         """ Returns an iterator for read the file byte per byte.
         Returns:
-            this entity as an iterator for read the file byte per byte
+            an iterator for read the file byte per byte
         """
         return self
 
@@ -35,41 +65,73 @@ class ByteReader:
             int: the next byte read from the file (eventually yields from the
             internal buffer) as integer
         """
+        if self._bytes is not None:
+            if self._position < len(self._bytes):
+                self._position += 1
+                return self._bytes[self._position - 1]
+            raise StopIteration
+
         c = self._file.read(1)
         if c:
             return c[0]
         raise StopIteration
 
+    def read_all(self) -> Union[bytes, memoryview]:
+        """ Reads all the remaining bytes of the file.
+        If the file is memory mapped the bytes are not copied, thus
+        the returned object can't be used after close() (which
+        releases it).
+
+        Returns:
+            the remaining bytes of the file, as a bytes-like object
+        """
+        if self._bytes is not None:
+            self._remaining = self._bytes[self._position:]
+            self._position = len(self._bytes)
+            return self._remaining
+
+        return self._file.read()
+
     def close(self):
         """ Closes the file. """
-        self._file.close()
+        try:
+            if self._bytes is not None:
+                # (The view returned by read_all() is released too, since
+                # the memory can't be unmapped while it's still exported)
+                if self._remaining is not None:
+                    self._remaining.release()
+                self._bytes.release()
+                self._mmap.close()
+        finally:
+            self._file.close()
 
 
 class ByteWriter:
     """ Entity that provides a way to write raw bytes to a file. """
 
-    def __init__(self, out_file_path: str, buffer_size: int = None):
+    def __init__(self, out_file_path: str, buffer_size: int = LZWConstants.IO_BUFFER_SIZE):
         """ Initializes a new ByteWriter for the given file, actually opening it.
         The file will be opened in binary mode.
 
         Args:
             out_file_path (str): the path of the file that will be written
             buffer_size (int): the size of the buffer to use for writes,
-                if not provided the default size will be used.
+                if not provided LZWConstants.IO_BUFFER_SIZE will be used.
         """
-        if buffer_size is not None:
-            self._file = open(out_file_path, "wb", buffering=buffer_size)
-        else:
-            self._file = open(out_file_path, "wb")
+        self._file = open(out_file_path, "wb", buffering=buffer_size)
 
-    def write(self, values: List[int]):
+    def write(self, values: Union[bytes, bytearray, memoryview, List[int]]):
         """ Writes the given integer values to the file as byte.
 
         Args:
             values (:obj:`list` of :obj:`int`): list of integer values to write
-                as bytes.
+                as bytes; can be also a bytes-like object, which is written
+                as it is without be copied.
         """
-        self._file.write(bytearray(values))
+        if isinstance(values, (bytes, bytearray, memoryview)):
+            self._file.write(values)
+        else:
+            self._file.write(bytes(values))
 
     def close(self):
         """ Closes the file. """
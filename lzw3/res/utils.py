@@ -1,4 +1,8 @@
-import pkg_resources
+try:
+    # importlib.resources.files() is available only from python3.9
+    from importlib.resources import files
+except ImportError:
+    files = None
 
 from lzw3.commons.utils import read_textual_file
 
@@ -6,7 +10,8 @@ from lzw3.commons.utils import read_textual_file
 def read_textual_resource(res: str) -> str:
     """ Reads the content of the given resource.
     The resource is loaded relatively to the path "res/"
-    using pkg_resources of setuptools.
+    using importlib.resources, or pkg_resources of setuptools
+    for older python versions.
 
     Args:
         res (str): the path of the resource relative to "res/"
@@ -14,5 +19,10 @@ def read_textual_resource(res: str) -> str:
     Returns:
         str: the content of the resource file
     """
-    return read_textual_file(pkg_resources.resource_filename(__name__, res))
+    if files is not None:
+        return files(__package__).joinpath(res).read_text()
 
+    # pkg_resources is imported only if actually needed since
+    # its import is quite slow
+    import pkg_resources
+    return read_textual_file(pkg_resources.resource_filename(__name__, res))
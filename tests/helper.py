@@ -1,58 +1,116 @@
+import filecmp
+import hashlib
 import os
-import shutil
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 from unittest import TestCase
 
 from lzw3.commons.constants import LZWConstants
 from lzw3.commons.log import Logger
-from lzw3.commons.utils import read_binary_file
 from lzw3.compressor import LZWCompressor
 from lzw3.decompressor import LZWDecompressor
 
 
-def remove_folder(path: str):
-    if os.path.exists(path):
-        shutil.rmtree(path)
+def create_folder(path: str):
+    os.makedirs(path, exist_ok=True)
 
 
-def create_folder(path: str):
-    if not os.path.exists(path):
-        os.makedirs(path)
+def file_digest(path: str) -> bytes:
+    # The file is hashed a chunk at a time, so that it's never loaded
+    # entirely in memory.
+    # (blake2b is available only from python3.6, sha256 is used otherwise)
+    if hasattr(hashlib, "blake2b"):
+        digest = hashlib.blake2b(digest_size=16)
+    else:
+        digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def first_difference(path_a: str, path_b: str) -> int:
+    # Returns the offset of the first byte that differs between the files
+    # (or the length of the shorter one if it's a prefix of the other),
+    # or -1 if the files are the same.
+    # The files are compared a chunk at a time, and only the first differing
+    # chunk is scanned byte per byte.
+    offset = 0
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            chunk_a = fa.read(1 << 20)
+            chunk_b = fb.read(1 << 20)
+            if chunk_a != chunk_b:
+                for a, b in zip(chunk_a, chunk_b):
+                    if a != b:
+                        break
+                    offset += 1
+                return offset
+            if not chunk_a:
+                return -1
+            offset += len(chunk_a)
+
+
+def roundtrip_file(file: str, verbose: bool) -> bool:
+    # Compresses and decompresses the file and returns whether the
+    # decompressed file is the same of the original one.
+    # (Is a module function so that can be executed by another process)
+    Logger.enable_logger(False)
+
+    uncompressed_file_path = file
+    compressed_file_path = file + LZWConstants.COMPRESSED_FILE_EXTENSION
+    decompressed_file_path = compressed_file_path + ".after"
+
+    if verbose:
+        print("Compressing '" + uncompressed_file_path + "'")
+    LZWCompressor().compress(
+        uncompressed_file_path,
+        compressed_file_path
+    )
+
+    if verbose:
+        print("Decompressing '" + compressed_file_path + "'")
+    LZWDecompressor().decompress(
+        compressed_file_path,
+        decompressed_file_path
+    )
+
+    # The files are compared chunk by chunk, stopping at the first difference.
+    # (The cache is cleared since the tests reuse the same paths and
+    # sizes, thus a stale result might be returned otherwise)
+    filecmp.clear_cache()
+    return filecmp.cmp(uncompressed_file_path, decompressed_file_path, shallow=False)
 
 
 class LZWTestHelper(TestCase):
 
+    # (Class attribute, so that can be used by class fixtures too)
+    verbose = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.verbose = False
         Logger.enable_logger(False)
 
     def _test_files(self, files: List[str]):
-        for file in files:
-            uncompressed_file_path = file
-            compressed_file_path = file + LZWConstants.COMPRESSED_FILE_EXTENSION
-            decompressed_file_path = compressed_file_path + ".after"
-
-            file_content = read_binary_file(uncompressed_file_path)
-
-            self.__print("Compressing '" + uncompressed_file_path + "'")
-            LZWCompressor().compress(
-                uncompressed_file_path,
-                compressed_file_path
-            )
-
-            self.__print("Decompressing '" + compressed_file_path + "'")
-            LZWDecompressor().decompress(
-                compressed_file_path,
-                decompressed_file_path
-            )
-
-            file_content_after = read_binary_file(decompressed_file_path)
-            self.assertEqual(file_content, file_content_after,
-                             "Content after compression and decompression of file '"
-                             + file + "' is not the same!")
-            self.__print("")
-
-    def __print(self, *args, **kwargs):
-        if self.verbose:
-            print(*args, **kwargs)
+        # The files are independent from each other, thus are tested
+        # in parallel if there is more than a CPU
+        jobs = min(len(files), os.cpu_count() or 1)
+
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(roundtrip_file, files,
+                                            [self.verbose] * len(files)))
+        else:
+            results = [roundtrip_file(file, self.verbose) for file in files]
+
+        for file, same in zip(files, results):
+            # The digests and the difference are computed only for report a failure
+            if not same:
+                decompressed_file_path = \
+                    file + LZWConstants.COMPRESSED_FILE_EXTENSION + ".after"
+                self.fail("Content after compression and decompression of file '"
+                          + file + "' is not the same! (digest "
+                          + file_digest(file).hex() + " != "
+                          + file_digest(decompressed_file_path).hex()
+                          + ", first difference at byte "
+                          + str(first_difference(file, decompressed_file_path)) + ")")
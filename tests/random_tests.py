@@ -1,63 +1,95 @@
 import os
 import random
+import tempfile
 import unittest
-from typing import Callable
+from typing import Callable, List
 
 from lzw3.commons.utils import humanify_bytesize
-from tests.helper import LZWTestHelper, remove_folder, create_folder
+from tests.helper import LZWTestHelper, create_folder
 
-RANDOM_FILES_OUTPUT_FOLDER = "/tmp/lzw/randoms"
 INITIAL_FILE_SIZE = 1024
 FILE_COUNT = 8
 MAX_CHUNKS = 10
 
 
-def create_random_file(path: str, size: int):
+def create_random_file(path: str, size: int, entropy: memoryview = None):
+    # The random bytes are taken from entropy, if given
     with open(path, 'wb') as fout:
-        fout.write(os.urandom(size))
+        fout.write(entropy[:size] if entropy is not None else os.urandom(size))
 
 
-def create_repeated_random_sequences_file(path: str, size: int):
+def create_repeated_random_sequences_file(path: str, size: int, entropy: memoryview = None):
+    # The random bytes are taken from entropy, if given
     with open(path, 'wb') as fout:
         chunks = random.randint(1, MAX_CHUNKS)
         chunk_size = size // chunks
-        bs = os.urandom(chunk_size)
-        fout.write(bs * chunks)
+        bs = entropy[:chunk_size] if entropy is not None else os.urandom(chunk_size)
+        # Written chunk by chunk for not build the whole content in memory
+        # (the list contains only references to the same chunk)
+        fout.writelines([bs] * chunks)
 
 
 class LZWRandomTests(LZWTestHelper):
 
+    @classmethod
+    def setUpClass(cls):
+        # The random files are created once for all the tests, in a
+        # temporary folder, each kind of file in its own subfolder
+        cls._output_folder = tempfile.TemporaryDirectory(prefix="lzw3-")
+
+        cls._random_files = cls.__create_files(
+            os.path.join(cls._output_folder.name, "truly"),
+            create_random_file
+        )
+        cls._repeated_files = cls.__create_files(
+            os.path.join(cls._output_folder.name, "repeated"),
+            create_repeated_random_sequences_file
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._output_folder.cleanup()
+
     def test_truly_random(self):
-        self.__test(create_random_file)
+        self.__test(self._random_files)
 
     def test_repeated_random_sequences(self):
-        self.__test(create_repeated_random_sequences_file)
+        self.__test(self._repeated_files)
 
-    def __test(self, create_file_function: Callable):
+    @classmethod
+    def __create_files(cls, folder: str, create_file_function: Callable) -> List[str]:
         sz = INITIAL_FILE_SIZE
 
-        remove_folder(RANDOM_FILES_OUTPUT_FOLDER)
-        create_folder(RANDOM_FILES_OUTPUT_FOLDER)
+        create_folder(folder)
 
-        files = []
+        # The random bytes for all the files are drawn at once
+        # and then split between the files
+        entropy = memoryview(os.urandom(INITIAL_FILE_SIZE * (2 ** FILE_COUNT - 1)))
 
-        self.__print("\n--- RANDOM TESTS ---")
+        files = []
 
         for i in range(FILE_COUNT):
             file_name = "r" + str(i) + ".bin"
 
             uncompressed_file_path = os.path.join(
-                RANDOM_FILES_OUTPUT_FOLDER,
+                folder,
                 file_name
             )
 
-            self.__print("Creating random file '" + uncompressed_file_path +
-                         "' of size = " + humanify_bytesize(sz))
-            create_file_function(uncompressed_file_path, sz)
+            if cls.verbose:
+                print("Creating random file '" + uncompressed_file_path +
+                      "' of size = " + humanify_bytesize(sz))
+            create_file_function(uncompressed_file_path, sz, entropy)
+            entropy = entropy[sz:]
             sz *= 2
 
             files.append(uncompressed_file_path)
 
+        return files
+
+    def __test(self, files: List[str]):
+        self.__print("\n--- RANDOM TESTS ---")
+
         self._test_files(files)
 
         self.__print("OK! Compressor and decompressor for random files (should) work")
@@ -1,11 +1,15 @@
+import filecmp
 import os
 import shutil
+import tempfile
 import unittest
 
-from tests.helper import create_folder, remove_folder, LZWTestHelper
+from lzw3.compressor import LZWCompressorHelper
+from lzw3.decompressor import LZWDecompressorHelper
+from tests.helper import LZWTestHelper
 
-STATIC_FILES_OUTPUT_FOLDER = "/tmp/lzw/statics"
 RESOURCES_FOLDER = "res"
+RESOURCES_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), RESOURCES_FOLDER)
 RESOURCES = [
     "dhclient.conf",
     "hdparm.conf",
@@ -15,27 +19,66 @@ RESOURCES = [
 
 class LZWStaticTests(LZWTestHelper):
 
+    def setUp(self):
+        # Each test uses its own temporary folder
+        self._output_folder = tempfile.TemporaryDirectory(prefix="lzw3-")
+
+    def tearDown(self):
+        self._output_folder.cleanup()
+
     def test_static(self):
         self.__test()
 
-    def __test(self):
-        remove_folder(STATIC_FILES_OUTPUT_FOLDER)
-        create_folder(STATIC_FILES_OUTPUT_FOLDER)
+    def test_empty(self):
+        empty_file_path = os.path.join(self._output_folder.name, "empty")
+        open(empty_file_path, "wb").close()
+
+        self._test_files([empty_file_path])
+
+    def test_bit_count_boundary(self):
+        # Each byte is written as its own sequence, thus the STREAM_END
+        # comes exactly when the decompressor switches to 10 bits
+        boundary_file_path = os.path.join(self._output_folder.name, "boundary")
+        with open(boundary_file_path, "wb") as boundary_file:
+            boundary_file.write(bytes(range(256)))
+
+        self._test_files([boundary_file_path])
+
+    def test_parallel_helpers(self):
+        # The resources are compressed and decompressed in place by the
+        # helpers, handling the files of the folder in parallel
+        folder = os.path.join(self._output_folder.name, "parallel")
+        shutil.copytree(RESOURCES_PATH, folder)
 
+        options = dict(recursive=True, verbose=False, time=False,
+                       keep=False, force=True, jobs=2)
+
+        LZWCompressorHelper(**options).handle([folder])
+        self.assertEqual(sorted(os.listdir(folder)),
+                         sorted(res_name + ".Z" for res_name in RESOURCES))
+
+        LZWDecompressorHelper(**options).handle([folder])
+        self.assertEqual(sorted(os.listdir(folder)), sorted(RESOURCES))
+
+        for res_name in RESOURCES:
+            self.assertTrue(filecmp.cmp(os.path.join(RESOURCES_PATH, res_name),
+                                        os.path.join(folder, res_name),
+                                        shallow=False))
+
+    def __test(self):
         files = []
 
         self.__print("\n--- STATIC TESTS ---")
 
         for res_name in RESOURCES:
-            current_path = os.path.abspath(os.path.dirname(__file__))
-            res_path = os.path.join(current_path, RESOURCES_FOLDER, res_name)
+            res_path = os.path.join(RESOURCES_PATH, res_name)
 
             uncompressed_file_path = os.path.join(
-                STATIC_FILES_OUTPUT_FOLDER,
+                self._output_folder.name,
                 res_name
             )
 
-            shutil.copy(res_path, uncompressed_file_path)
+            shutil.copyfile(res_path, uncompressed_file_path)
 
             files.append(uncompressed_file_path)
 